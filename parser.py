@@ -0,0 +1,298 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import aiofiles
+import re
+import logging
+import orjson
+from lxml import etree
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+def _class_xpath(tag: str, css_class: str) -> etree.XPath:
+    """Compiled XPath for descendant <tag> elements whose class list contains css_class."""
+    return etree.XPath(
+        f".//{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+    )
+
+# Product page lookups, compiled once and evaluated in C by lxml
+BREADCRUMBS_XPATH = _class_xpath('div', 'breadcrumbs')
+BREADCRUMB_LAST_XPATH = _class_xpath('span', 'breadcrumb_last')
+PRODUCT_CONTENT_XPATH = _class_xpath('div', 'productContent')
+INGREDIENTS_XPATH = _class_xpath('div', 'ingrediences')
+INGREDIENTS_TEXT_XPATH = _class_xpath('div', 'text-content')
+PRICE_XPATH = _class_xpath('b', 'loadPrice')
+# Descendant text, skipping <script>/<style> content like BeautifulSoup's get_text()
+TEXT_XPATH = etree.XPath('.//text()[not(ancestor::script or ancestor::style)]', smart_strings=False)
+
+# Size of the pieces product pages are fed to the HTML parser in
+HTML_CHUNK_SIZE = 64 * 1024
+
+# Marker shown on discontinued product pages
+SOLD_OUT_TEXT = "již se neprodává"
+# Class WordPress puts on <body> when it renders the not-found template
+NOT_FOUND_BODY_CLASS = 'error404'
+
+# Pages outside this size range (in characters) are error stubs or listing pages, not products
+MIN_HTML_SIZE = 500
+MAX_HTML_SIZE = 1_500_000
+
+# Maps every ASCII character other than [A-Za-z0-9_.-] to '_' for output filenames
+FILENAME_TABLE = str.maketrans({
+    chr(i): '_' for i in range(128) if not (chr(i).isalnum() or chr(i) in '-_.')
+})
+
+# Patterns used per page / per paragraph, compiled once
+VOLUME_RE = re.compile(r'Obsah:\s*(\d+(?:\.\d+)?)\s*ml', re.IGNORECASE)
+PURPOSE_RE = re.compile(r'^[A-ZÁČĎÉĚÍŇÓŘŠŤÚŮÝŽ\s–\-]+$')
+LEADING_DASH_RE = re.compile(r'^[\s\-–]+')
+SUITABLE_RE = re.compile(r'^.*?vhodná pro:\s*', re.IGNORECASE)
+TYP_RE = re.compile(r'^.*?typ pleti[:\s]*', re.IGNORECASE)
+VHODNY_RE = re.compile(r'^.*?vhodný pro[:\s]*', re.IGNORECASE)
+HOWTO_RE = re.compile(r'^.*?jak použít:\s*', re.IGNORECASE)
+POUZITI_RE = re.compile(r'^.*?použití[:\s]*', re.IGNORECASE)
+
+# Paragraphs containing any of these are field paragraphs, never the description
+DESCRIPTION_SKIP_MARKERS = ('Vhodná pro:', 'Typ pleti', 'VHODNÝ PRO', 'Jak použít:')
+
+# (lowercase marker, field, prefix to strip) in priority order
+FIELD_RULES = (
+    ('vhodná pro:', 'suitable_for', SUITABLE_RE),
+    ('typ pleti', 'suitable_for', TYP_RE),
+    ('vhodný pro', 'suitable_for', VHODNY_RE),
+    ('jak použít:', 'how_to_use', HOWTO_RE),
+    ('použití', 'how_to_use', POUZITI_RE),
+)
+
+def url_to_filename(url: str) -> str:
+    """Filesystem-safe file name (without extension) for a page URL."""
+    return url.split('//', 1)[-1].translate(FILENAME_TABLE)
+
+async def _write_file(path: str, payload: bytes):
+    """Write an already-encoded payload with a single write call."""
+    async with aiofiles.open(path, 'wb') as f:
+        await f.write(payload)
+
+async def save_result_markdown(result, filename, path='pages'):
+    await _write_file(f'{path}/{filename}.md', result.markdown.encode('utf-8'))
+
+async def save_result_full_html(result, filename, path='pages'):
+    await _write_file(f'{path}/{filename}-full.html', result.html.encode('utf-8'))
+
+async def save_result_clean_html(result, filename, path='pages'):
+    await _write_file(f'{path}/{filename}-clean.html', result.cleaned_html.encode('utf-8'))
+
+async def save_extracted_data(filename, data, path='pages'):
+    await _write_file(f'{path}/{filename}.json', orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+def _first(xpath: etree.XPath, element):
+    """First element matched by xpath under element, or None."""
+    matches = xpath(element)
+    return matches[0] if matches else None
+
+def _text(element) -> str:
+    """Concatenated text of element and its descendants."""
+    return ''.join(TEXT_XPATH(element))
+
+def _main_bounds(html: str) -> Tuple[int, int]:
+    """Raw offsets of the <main> element, or of the whole page if it has none."""
+    start = html.find('<main')
+    if start == -1:
+        return 0, len(html)
+    end = html.find('</main>', start)
+    return start, end if end != -1 else len(html)
+
+def _is_not_found_page(html: str) -> bool:
+    """Check the raw <body> tag for the not-found class without parsing the page."""
+    start = html.find('<body')
+    if start == -1:
+        return False
+    end = html.find('>', start)
+    return NOT_FOUND_BODY_CLASS in html[start:end]
+
+def _parse_main(html: str):
+    """
+    Parse html only up to the end of its first <main> element.
+
+    The page is fed to lxml's push parser in chunks and parsing stops as soon
+    as </main> has been seen, so footers and trailing scripts are never tokenized.
+
+    Returns:
+        The <main> element, or None if the page has none
+    """
+    parser = etree.HTMLPullParser(events=('end',), tag='main')
+    for offset in range(0, len(html), HTML_CHUNK_SIZE):
+        parser.feed(html[offset:offset + HTML_CHUNK_SIZE])
+        for _, main_div in parser.read_events():
+            return main_div
+    parser.close()
+    for _, main_div in parser.read_events():
+        return main_div
+    return None
+
+def parse_product(html: str, url: str) -> Optional[Dict[str, Union[str, List[str], float, None]]]:
+    """
+    Parse a product page and extract its data.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        html: Raw HTML of the crawled page
+        url: URL of the crawled page
+
+    Returns:
+        Extracted product data, or None if the page has no product to save
+    """
+    # Parse HTML and find main div
+    try:
+        main_div = _parse_main(html)
+    except (etree.LxmlError, ValueError) as e:
+        logger.warning(f"SKIPPED - Unparseable HTML ({e}): {url}")
+        return None
+    
+    if main_div is None:
+        return None
+    
+    main_content = _text(main_div)
+    
+    if "404" in main_content:
+        logger.warning(f"SKIPPED - 404 Error in main: {url}")
+        return None
+    
+    if SOLD_OUT_TEXT in main_content:
+        logger.warning(f"SKIPPED - Product no longer sold in main: {url}")
+        return None
+    
+    logger.info(f"Extracting data: {url}")
+    return extract_data(main_div, url)
+
+async def process_result(result, executor: ProcessPoolExecutor):
+    # Cheap size and substring checks on the raw page before shipping it to a parser
+    html_size = len(result.html)
+    if not MIN_HTML_SIZE <= html_size <= MAX_HTML_SIZE:
+        logger.warning(f"SKIPPED - Page size {html_size} out of range: {result.url}")
+        return
+    
+    if _is_not_found_page(result.html):
+        logger.warning(f"SKIPPED - 404 page: {result.url}")
+        return
+    
+    # Only look inside <main>, related products elsewhere may be sold out
+    main_start, main_end = _main_bounds(result.html)
+    if result.html.find(SOLD_OUT_TEXT, main_start, main_end) != -1:
+        logger.warning(f"SKIPPED - Product no longer sold in main: {result.url}")
+        return
+    
+    # Parse off the event loop so crawling continues meanwhile
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(executor, parse_product, result.html, result.url)
+    filename = url_to_filename(result.url)
+    if data:
+        await save_extracted_data(filename, data)
+    
+    # Process successful results
+    logger.info(f"Processing: {result.url}")
+    # await save_result_markdown(result, filename)
+    # await save_result_full_html(result, filename)
+
+    # await save_result_clean_html(result, filename)
+
+def extract_data(div, url:str) -> Dict[str, Union[str, List[str], float, None]]:
+    
+    data = {
+        'url': url,
+        'category': None,
+        'volume': None,
+        'purpose': None,
+        'description': None,
+        'suitable_for': None,
+        'how_to_use': None,
+        'ingredients': None,
+        'price': None
+    }
+    
+    # Extract category from breadcrumbs
+    breadcrumbs = _first(BREADCRUMBS_XPATH, div)
+    if breadcrumbs is not None:
+        links = list(breadcrumbs.iter('a'))
+        category = [_text(link).strip() for link in links[1:]]  # Skip first "Krása na míru"
+        
+        # Add the last breadcrumb (current page)
+        last_breadcrumb = _first(BREADCRUMB_LAST_XPATH, breadcrumbs)
+        if last_breadcrumb is not None:
+            category.append(_text(last_breadcrumb).strip())
+        
+        data['category'] = category if category else None
+    
+    # Extract data from productContent
+    product_content = _first(PRODUCT_CONTENT_XPATH, div)
+    if product_content is not None:
+        # Extract all paragraphs
+        paragraphs = product_content.iter('p')
+        
+        for p in paragraphs:
+            p_text = _text(p).strip()
+            p_low = p_text.lower()
+            
+            # Extract volume from the paragraph that mentions it
+            if data['volume'] is None and 'obsah' in p_low:
+                volume_match = VOLUME_RE.search(p_text)
+                if volume_match:
+                    data['volume'] = float(volume_match.group(1))
+            
+            # Check if paragraph starts with purpose in strong tag (only until one is found)
+            strong_first = None if data['purpose'] else p.find('.//strong')
+            if strong_first is not None:
+                strong_text = _text(strong_first).strip()
+                # Check if it looks like a purpose (uppercase with dashes/hyphens)
+                if PURPOSE_RE.match(strong_text):
+                    purpose_list = [item.strip() for item in strong_text.split('–') if item.strip()]
+                    data['purpose'] = purpose_list
+                    # Extract remaining text as description
+                    if not data['description']:
+                        # Remove the strong content and clean up
+                        remaining_text = p_text.replace(strong_text, '').strip()
+                        remaining_text = LEADING_DASH_RE.sub('', remaining_text)  # Remove leading dashes/spaces
+                        if remaining_text:
+                            data['description'] = remaining_text
+                    continue
+            
+            # Extract description (paragraph starting with "Jednorázová")
+            if not data['description'] and len(p_text) > 50:  # Minimum length threshold
+                # Skip if it's a specific field
+                if not any(marker in p_text for marker in DESCRIPTION_SKIP_MARKERS):
+                    data['description'] = p_text
+                    continue
+            
+            # Extract suitable_for / how_to_use (first matching marker wins)
+            for marker, field, prefix_re in FIELD_RULES:
+                if marker in p_low:
+                    data[field] = prefix_re.sub('', p_text).strip()
+                    break
+        
+        # Volume outside any <p> (or split across elements), search the whole block
+        if data['volume'] is None:
+            volume_match = VOLUME_RE.search(_text(product_content))
+            if volume_match:
+                data['volume'] = float(volume_match.group(1))
+    
+    # Extract ingredients
+    ingredients_section = _first(INGREDIENTS_XPATH, div)
+    if ingredients_section is not None:
+        text_content = _first(INGREDIENTS_TEXT_XPATH, ingredients_section)
+        if text_content is not None:
+            ingredients_text = _text(text_content).strip()
+            # Clean up ingredients text
+            if ingredients_text.startswith('Ingredients:'):
+                ingredients_text = ingredients_text[12:].strip()
+            data['ingredients'] = ingredients_text
+
+    # Extract price
+    price_element = _first(PRICE_XPATH, div)
+    if price_element is not None:
+        try:
+            data['price'] = float(_text(price_element).strip())
+        except ValueError:
+            data['price'] = None
+    
+    return data
@@ -0,0 +1,84 @@
+import xml.etree.ElementTree as ET
+import aiohttp
+from typing import Optional
+
+# <url> tag -> its <loc> child, with and without the sitemap namespace
+SITEMAP_LOC_TAGS = {
+    '{http://www.sitemaps.org/schemas/sitemap/0.9}url': '{http://www.sitemaps.org/schemas/sitemap/0.9}loc',
+    'url': 'loc',
+}
+SITEMAP_CHUNK_SIZE = 64 * 1024
+
+# Long-lived HTTP session shared by all outbound requests, see get_session()
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """
+    Return the shared HTTP session, creating it on first use.
+
+    Keep-alive connections and cached DNS lookups are reused across requests.
+    Call close_session() once all requests are done.
+    """
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=1024,
+                limit_per_host=64,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+        )
+    return _session
+
+async def close_session() -> None:
+    """Close the shared HTTP session if it was opened."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def _collect_sitemap_urls(parser: ET.XMLPullParser, urls: list[str]) -> None:
+    """Append <loc> of every completed <url> element and free it."""
+    for _, element in parser.read_events():
+        loc_tag = SITEMAP_LOC_TAGS.get(element.tag)
+        if loc_tag is None:
+            continue
+        loc_element = element.find(loc_tag)
+        if loc_element is not None:
+            urls.append(loc_element.text)
+        element.clear()
+
+async def get_urls(sitemap_url: str = "https://www.krasanamiru.cz/product-sitemap.xml") -> list[str]:
+    """
+    Extract product URLs from XML sitemap.
+    
+    Args:
+        sitemap_url: URL of the XML sitemap
+        
+    Returns:
+        List of product URLs
+    """
+    try:
+        print(f"🔍 Fetching sitemap: {sitemap_url}")
+        timeout = aiohttp.ClientTimeout(total=30)
+        parser = ET.XMLPullParser(events=('end',))
+        urls = []
+        session = await get_session()
+        async with session.get(sitemap_url, timeout=timeout) as response:
+            response.raise_for_status()
+            # Parse XML incrementally as it arrives
+            async for chunk in response.content.iter_chunked(SITEMAP_CHUNK_SIZE):
+                parser.feed(chunk)
+                _collect_sitemap_urls(parser, urls)
+        parser.close()
+        _collect_sitemap_urls(parser, urls)
+        
+        print(f"✅ Found {len(urls)} URLs in sitemap")
+        return urls
+        
+    except Exception as e:
+        print(f"❌ Error fetching sitemap: {e}")
+        return []